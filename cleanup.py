@@ -4,6 +4,7 @@ import os
 from dotenv import load_dotenv
 import asyncio
 import shutil
+from profiler import PROFILE_DIR
 
 load_dotenv()
 mongo_uri = os.getenv("MONGO_URL")
@@ -24,6 +25,7 @@ async def cleanup_old_files():
 
         not_translated_file = os.path.join(not_translated_path, file_id)
         translated_file = os.path.join(translated_path, file_id)
+        profile_file = os.path.join(PROFILE_DIR, f"{file_id}.folded")
 
         try:
             # Log před pokusem o smazání složky
@@ -36,6 +38,9 @@ async def cleanup_old_files():
             if os.path.exists(translated_file):
                 shutil.rmtree(translated_file)
                 print(f"Removed directory: {translated_file}")
+            if os.path.exists(profile_file):
+                os.remove(profile_file)
+                print(f"Removed profile: {profile_file}")
         except Exception as e:
             print(f"Error deleting directory {file_id}: {e}")
 
@@ -19,6 +19,7 @@ from typing import List
 from cleanup import schedule_cleanup
 import time
 from schemas import FeedbackRequest, TranslateRequest
+from profiler import PROFILING_ENABLED
 
 not_translated_folder = "not_translated_files"
 if not os.path.exists(not_translated_folder):
@@ -34,10 +35,11 @@ async def process_queue():
     while True:
         try:
             try:
-                file_id, file_path, target_lang = await asyncio.wait_for(
+                file_id, file_path, target_lang, profile, enqueued_at = await asyncio.wait_for(
                     translation_queue.get(), timeout=60
                 )
-                print(f"Processing file: {file_id} -> {target_lang}")
+                queue_wait = time.time() - enqueued_at
+                print(f"Processing file: {file_id} -> {target_lang} (waited {queue_wait:.2f}s)")
             except asyncio.TimeoutError:
                 continue
 
@@ -52,14 +54,19 @@ async def process_queue():
                     "start_time": time.time()
                 }
 
-                await translate_file(file_id, file_path, target_lang)
+                await translate_file(
+                    file_id, file_path, target_lang,
+                    queue_wait=queue_wait, profile=profile
+                )
                 
             except Exception as translate_error:
                 print(f"Error translating file {file_id}: {translate_error}")
-                translation_status[file_id] = {
-                    "status": "error",
-                    "error_message": str(translate_error)
-                }
+                # translate_file už uložil chybu včetně časového rozpisu
+                if translation_status.get(file_id, {}).get("status") != "error":
+                    translation_status[file_id] = {
+                        "status": "error",
+                        "error_message": str(translate_error)
+                    }
             finally:
                 translation_queue.task_done()
                 
@@ -141,6 +148,12 @@ async def translate(
             detail=f"Unsupported target language. Available languages: {', '.join(get_available_languages())}"
         )
     
+    if request.profile and not PROFILING_ENABLED:
+        raise HTTPException(
+            status_code=400,
+            detail="Profiling is disabled on this server"
+        )
+
     file_extension = os.path.splitext(file.filename)[1].lower()
     if file_extension != '.ass':
         raise HTTPException(
@@ -158,7 +171,7 @@ async def translate(
     creation_time = datetime.utcnow()
     await save_file(file_id, creation_time, False, False)
     
-    await translation_queue.put((file_id, file_path, target_lang))
+    await translation_queue.put((file_id, file_path, target_lang, request.profile, time.time()))
     return {
         "file_id": file_id,
         "status": "queued",
@@ -213,7 +226,7 @@ async def get_file_content(file_id: str):
 
 @app.get("/status/{file_id}")
 async def get_status(file_id: str):
-    """Get current translation status, including queue position and ETA"""
+    """Get current translation status, including queue position, ETA and per-stage timings"""
     status = get_translation_status(file_id)
     if not status:
         raise HTTPException(status_code=404, detail="Translation not found")
@@ -0,0 +1,88 @@
+import os
+import sys
+import threading
+import logging
+
+from collections import Counter
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.005"))
+
+
+class StackSampler:
+    """Sample the call stack of one thread at a steady cadence, in collapsed (flamegraph) format
+
+    The owner marks which stage is running with enter()/leave(); a sample is kept
+    only if the same stage entry was active both before and after the stack was
+    taken, so work the event loop runs between stages is never attributed to the job.
+    Each kept stack is rooted at a 'stage:<name>' frame.
+    """
+
+    def __init__(self, thread_id: int, interval: float = PROFILE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        # (pořadí vstupu, název fáze); None mimo měřenou fázi
+        self._stage = None
+        self._entries = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def enter(self, stage: str):
+        self._entries += 1
+        self._stage = (self._entries, stage)
+
+    def leave(self):
+        self._stage = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            stage = self._stage
+            if stage is None:
+                continue
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+                frame = frame.f_back
+            if self._stage is not stage:
+                continue
+            stack.append(f"stage:{stage[1]}")
+            self.samples[";".join(reversed(stack))] += 1
+
+    def dump(self, path: str):
+        """Write samples as 'frame;frame;... count' lines"""
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def start_job_profile() -> StackSampler:
+    """Start sampling the calling thread (the event loop running the job)"""
+    sampler = StackSampler(threading.get_ident())
+    sampler.start()
+    return sampler
+
+
+def finish_job_profile(sampler: StackSampler, file_id: str):
+    """Stop sampling and dump the profile; returns the file name, or None on failure"""
+    sampler.stop()
+    file_name = f"{file_id}.folded"
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        sampler.dump(os.path.join(PROFILE_DIR, file_name))
+    except Exception as e:
+        logging.error(f"Failed to write profile for {file_id}: {str(e)}")
+        return None
+    return file_name
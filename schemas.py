@@ -27,4 +27,5 @@ class FeedbackRequest(BaseModel):
 
 class TranslateRequest(BaseModel):
     target_lang: str = Field(..., description="Target language code in the format 'source-target', e.g., 'en-cs'.")
-    file: UploadFile = Field(..., description="File to be translated")
\ No newline at end of file
+    file: UploadFile = Field(..., description="File to be translated")
+    profile: bool = Field(False, description="Capture a sampled profile of this job's on-CPU time (requires PROFILING_ENABLED on the server)")
\ No newline at end of file
@@ -4,6 +4,8 @@ from typing import Dict
 import os
 import time
 import logging
+from contextlib import contextmanager
+from profiler import start_job_profile, finish_job_profile
 
 # Nastavení logování
 #logging.basicConfig(level=logging.DEBUG, format="%(asctime)s - %(message)s")
@@ -40,6 +42,22 @@ def initialize_translator(target_lang: str):
         translators[target_lang] = pipeline("translation", model=AVAILABLE_MODELS[target_lang])
     return translators.get(target_lang)
 
+@contextmanager
+def track_stage(timings: Dict[str, float], stage: str, sampler=None):
+    """Add wall time spent inside the block to timings[stage], sampling it if profiling"""
+    if sampler:
+        sampler.enter(stage)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - start
+        if sampler:
+            sampler.leave()
+
+def count_tokens(translator, text: str) -> int:
+    return len(translator.tokenizer(text)["input_ids"])
+
 def get_queue_position(file_id: str) -> int:
     try:
         return active_translations.index(file_id)
@@ -55,20 +73,48 @@ def create_info_dialogue(target_lang: str) -> str:
         f"For more information, visit translate.notmarra.com ****"
     )
 
-async def translate_file(file_id: str, file_path: str, target_lang: str = "en-cs"):
+async def translate_file(file_id: str, file_path: str, target_lang: str = "en-cs",
+                         queue_wait: float = 0.0, profile: bool = False):
     logging.debug(f"Starting translation for file: {file_id}, target language: {target_lang}")
+    # Rozpis času podle fází úlohy
+    timings = {"queue_wait": queue_wait, "model_load": 0.0, "parse": 0.0,
+               "inference": 0.0, "sleep": 0.0, "write": 0.0}
+    # Počítání tokenů znamená druhou tokenizaci každého řádku, proto jen u profilovaných úloh;
+    # fáze "tokenize" je režie měření, ne součást překladu
+    tokens_processed = 0 if profile else None
+    translator_calls = 0
+    job_start = time.perf_counter()
+    sampler = start_job_profile() if profile else None
+    profile_file = None
+
+    def timing_report():
+        total = queue_wait + time.perf_counter() - job_start
+        return {
+            "timings": {**timings, "other": total - sum(timings.values()), "total": total},
+            "tokens_processed": tokens_processed,
+            "translator_calls": translator_calls,
+        }
+
+    def finish_profile():
+        # Profil je jen diagnostika, nesmí ovlivnit výsledek úlohy ani fázi "write"
+        with track_stage(timings, "profile_dump"):
+            return finish_job_profile(sampler, file_id)
+
     try:
         if file_id not in active_translations:
             active_translations.append(file_id)
         
-        translator = initialize_translator(target_lang)
+        with track_stage(timings, "model_load", sampler):
+            translator = initialize_translator(target_lang)
         if not translator:
             raise ValueError(f"Unsupported target language: {target_lang}")
 
-        content = open(file_path, "r", encoding="utf-8-sig").read()
-        lines = content.split("\n")
-        total_lines = len(lines)
-        dialogue_lines = sum(1 for line in lines if "Dialogue:" in line)
+        with track_stage(timings, "parse", sampler):
+            with open(file_path, "r", encoding="utf-8-sig") as f:
+                content = f.read()
+            lines = content.split("\n")
+            total_lines = len(lines)
+            dialogue_lines = sum(1 for line in lines if "Dialogue:" in line)
         translated_lines = 0
         
         # Initialize translations list
@@ -91,15 +137,16 @@ async def translate_file(file_id: str, file_path: str, target_lang: str = "en-cs
         logging.debug(f"Translation status initialized: {translation_status[file_id]}")
 
         # Find position to insert info line (after style section, before first dialogue)
-        insert_position = 0
-        for i, line in enumerate(lines):
-            if line.strip().startswith("[Events]"):
-                # Find the Format line that follows [Events]
-                for j in range(i + 1, len(lines)):
-                    if lines[j].strip().startswith("Format:"):
-                        insert_position = j + 1
-                        break
-                break
+        with track_stage(timings, "parse", sampler):
+            insert_position = 0
+            for i, line in enumerate(lines):
+                if line.strip().startswith("[Events]"):
+                    # Find the Format line that follows [Events]
+                    for j in range(i + 1, len(lines)):
+                        if lines[j].strip().startswith("Format:"):
+                            insert_position = j + 1
+                            break
+                    break
 
         # Create the translated content with information line
         translated_lines = lines[:insert_position]
@@ -111,7 +158,12 @@ async def translate_file(file_id: str, file_path: str, target_lang: str = "en-cs
                 parts = line.split(",", 9)
                 if len(parts) > 9:
                     original = parts[9].strip()
-                    translated = translator(original)[0]["translation_text"]
+                    with track_stage(timings, "inference", sampler):
+                        translated = translator(original)[0]["translation_text"]
+                    translator_calls += 1
+                    if profile:
+                        with track_stage(timings, "tokenize", sampler):
+                            tokens_processed += count_tokens(translator, original)
                     translations.append((original, translated))
                     line = line.replace(original, translated)
                     
@@ -128,29 +180,44 @@ async def translate_file(file_id: str, file_path: str, target_lang: str = "en-cs
                         "estimated_completion_time": current_time + (remaining_lines * time_per_line)
                     })
                     
-                    await asyncio.sleep(AVERAGE_TIME_PER_LINE)
+                    with track_stage(timings, "sleep"):
+                        await asyncio.sleep(AVERAGE_TIME_PER_LINE)
             else:
                 translated_lines.append(line)
 
         # Save the translated file
         translated_file_path = file_path.replace("not_translated_files", "translated_files")
-        with open(translated_file_path, "w", encoding="utf-8") as f:
-            f.write("\n".join(translated_lines))
-            
+        with track_stage(timings, "write", sampler):
+            with open(translated_file_path, "w", encoding="utf-8") as f:
+                f.write("\n".join(translated_lines))
+
+        if sampler:
+            profile_file = finish_profile()
+            sampler = None
+
         translation_status[file_id].update({
             "status": "completed",
             "queue_position": -1,
-            "completion_time": time.time()
+            "completion_time": time.time(),
+            "profile_file": profile_file,
+            **timing_report()
         })
 
     except Exception as e:
         logging.error(f"Translation error for {file_id}: {str(e)}")
+        if sampler:
+            profile_file = finish_profile()
+            sampler = None
         translation_status[file_id] = {
             "status": "error",
-            "error_message": str(e)
+            "error_message": str(e),
+            "profile_file": profile_file,
+            **timing_report()
         }
         raise
     finally:
+        if sampler:
+            sampler.stop()
         if file_id in active_translations:
             active_translations.remove(file_id)
 